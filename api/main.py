@@ -3,17 +3,28 @@ Getaround Price Prediction API
 This API provides a model for predicting optimal rental prices based on car features.
 """
 
-from typing import List
-from fastapi import FastAPI
-from fastapi.responses import HTMLResponse, JSONResponse
-from pydantic import BaseModel
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, Response
+from pydantic import BaseModel, ConfigDict
 import joblib
+import numpy as np
+import onnxruntime as ort
 import pandas as pd
 
 
 class CarFeatures(BaseModel):
     """Model representing the features of a car for price prediction."""
 
+    model_config = ConfigDict(extra="forbid", frozen=True)
+
     mileage: float
     engine_power: float
     model_key: str
@@ -35,20 +46,96 @@ class InputData(BaseModel):
     input: List[CarFeatures]
 
 
+class PredictionOutput(BaseModel):
+    """Model for the output of the prediction endpoint."""
+
+    prediction: List[float]
+
+
 app = FastAPI(
     title="Getaround Price Prediction API",
     description="API to predict rental prices for cars based on features",
     version="1.0",
 )
 
-# Load the trained model once
-model = joblib.load("model/model.joblib")
+# Load the trained model once, preferring the ONNX export when available
+ONNX_MODEL_PATH = "model/model.onnx"
+if os.path.exists(ONNX_MODEL_PATH):
+    # The tree ensemble already runs as a native kernel; keep one thread per
+    # call since concurrency comes from the inference executor below
+    session_options = ort.SessionOptions()
+    session_options.graph_optimization_level = (
+        ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    )
+    session_options.intra_op_num_threads = 1
+    session_options.inter_op_num_threads = 1
+    session = ort.InferenceSession(
+        ONNX_MODEL_PATH,
+        sess_options=session_options,
+        providers=["CPUExecutionProvider"],
+    )
+    onnx_inputs = [
+        (inp.name, object if inp.type == "tensor(string)" else np.float32)
+        for inp in session.get_inputs()
+    ]
+    model = None
+else:
+    session = None
+    model = joblib.load("model/model.joblib")
+
+# Feature columns in the order expected by the model pipeline
+FEATURES = list(CarFeatures.model_fields)
 
+# In-process LRU cache of predictions, keyed by the tuple of feature values
+CACHE_MAXSIZE = 100_000
+prediction_cache: "OrderedDict[Tuple, float]" = OrderedDict()
+cache_lock = threading.Lock()
 
-@app.get("/", response_class=HTMLResponse)
-async def root():
-    """Root endpoint that returns a stylish HTML welcome page."""
-    html_content = """
+# Dedicated pool for model inference, sized to the available cores, so that
+# prediction never blocks the event loop nor competes with AnyIO's own pool
+EXECUTOR = ThreadPoolExecutor(max_workers=os.cpu_count())
+
+
+def run_model(columns: Dict[str, list]) -> np.ndarray:
+    """Run the loaded model on car features given as per-column lists."""
+    if session is None:
+        return model.predict(pd.DataFrame(columns))
+    # Feed ONNX Runtime contiguous [N, 1] arrays directly, without a DataFrame
+    feeds = {
+        name: np.array(columns[name], dtype=dtype).reshape(-1, 1)
+        for name, dtype in onnx_inputs
+    }
+    return session.run(None, feeds)[0].ravel()
+
+
+def predict_with_cache(items: List[CarFeatures]) -> List[float]:
+    """Predict prices, only running the model for cars not seen before."""
+    # Read the typed attributes directly instead of materializing a dict per car
+    keys = [tuple(getattr(item, col) for col in FEATURES) for item in items]
+    results = {}
+    with cache_lock:
+        for key in keys:
+            if key in prediction_cache:
+                prediction_cache.move_to_end(key)
+                results[key] = prediction_cache[key]
+
+    missing = list(dict.fromkeys(key for key in keys if key not in results))
+    if missing:
+        # Transpose the uncached rows into per-column lists in one pass
+        columns = dict(zip(FEATURES, map(list, zip(*missing))))
+        # Round to cents, hiding float32 artifacts from the ONNX session
+        predictions = np.round(run_model(columns).astype(np.float64), 2).tolist()
+        results.update(zip(missing, predictions))
+        with cache_lock:
+            prediction_cache.update(zip(missing, predictions))
+            while len(prediction_cache) > CACHE_MAXSIZE:
+                prediction_cache.popitem(last=False)
+
+    return [results[key] for key in keys]
+
+
+# Static welcome page, served with caching headers
+ROOT_HTML = """
     <html lang="en">
         <head>
             <meta charset="UTF-8">
@@ -140,191 +227,211 @@ async def root():
         </body>
     </html>
     """
-    return html_content
+ROOT_BODY = ROOT_HTML.encode()
+ROOT_ETAG = '"%s"' % hashlib.md5(ROOT_BODY, usedforsecurity=False).hexdigest()
+ROOT_HEADERS = {"Cache-Control": "public, max-age=86400", "ETag": ROOT_ETAG}
+
+
+@app.get("/", response_class=HTMLResponse)
+async def root(request: Request):
+    """Root endpoint that returns a stylish HTML welcome page."""
+    if ROOT_ETAG in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=ROOT_HEADERS)
+    return HTMLResponse(ROOT_BODY, headers=ROOT_HEADERS)
 
 
 @app.post("/predict")
-def predict(data: InputData):
+async def predict(data: InputData) -> PredictionOutput:
     """Endpoint to predict rental prices based on car features."""
-    # Convert input list of CarFeatures to a pandas DataFrame
-    input_dicts = [item.dict() for item in data.input]
-    df = pd.DataFrame(input_dicts)
-    # Predict using the loaded model pipeline
-    predictions = model.predict(df)
-    # Return predictions as a list
-    return {"prediction": predictions.tolist()}
+    # Predict using the loaded model pipeline and the cache, off the event loop
+    loop = asyncio.get_running_loop()
+    predictions = await loop.run_in_executor(
+        EXECUTOR, predict_with_cache, data.input
+    )
+    # Return predictions as a list, serialized to JSON bytes by pydantic-core
+    return PredictionOutput(prediction=predictions)
 
 
-# Documentation route
-@app.get("/docs", include_in_schema=False)
-def custom_docs():
-    """Custom JSON documentation for the API."""
-    return JSONResponse(
-        content={
-            "title": "Getaround Price Prediction API",
-            "description": (
-                "Predict optimal rental prices for cars by sending their features in JSON format "
-                "to the /predict endpoint. Each car must be described as a dictionary of features."
-            ),
-            "endpoints": {
-                "/predict": {
-                    "method": "POST",
-                    "description": "Predicts car rental prices based on provided features.",
+# Static JSON documentation, serialized once at import time
+DOCS = {
+    "title": "Getaround Price Prediction API",
+    "description": (
+        "Predict optimal rental prices for cars by sending their features in JSON format "
+        "to the /predict endpoint. Each car must be described as a dictionary of features."
+    ),
+    "endpoints": {
+        "/predict": {
+            "method": "POST",
+            "description": "Predicts car rental prices based on provided features.",
+            "input": {
+                "type": "object",
+                "properties": {
                     "input": {
-                        "type": "object",
-                        "properties": {
-                            "input": {
-                                "type": "array",
-                                "description": "A list of car objects, each containing all required features.",
-                                "items": {
-                                    "type": "object",
-                                    "properties": {
-                                        "mileage": {"type": "float", "example": 7.0},
-                                        "engine_power": {
-                                            "type": "float",
-                                            "example": 0.27,
-                                        },
-                                        "model_key": {
-                                            "type": "string",
-                                            "example": "Citroën",
-                                        },
-                                        "fuel": {"type": "string", "example": "diesel"},
-                                        "paint_color": {
-                                            "type": "string",
-                                            "example": "black",
-                                        },
-                                        "car_type": {
-                                            "type": "string",
-                                            "example": "sedan",
-                                        },
-                                        "private_parking_available": {
-                                            "type": "boolean",
-                                            "example": True,
-                                        },
-                                        "has_gps": {"type": "boolean", "example": True},
-                                        "has_air_conditioning": {
-                                            "type": "boolean",
-                                            "example": False,
-                                        },
-                                        "automatic_car": {
-                                            "type": "boolean",
-                                            "example": False,
-                                        },
-                                        "has_getaround_connect": {
-                                            "type": "boolean",
-                                            "example": True,
-                                        },
-                                        "has_speed_regulator": {
-                                            "type": "boolean",
-                                            "example": False,
-                                        },
-                                        "winter_tires": {
-                                            "type": "boolean",
-                                            "example": True,
-                                        },
-                                    },
-                                    "required": [
-                                        "mileage",
-                                        "engine_power",
-                                        "model_key",
-                                        "fuel",
-                                        "paint_color",
-                                        "car_type",
-                                        "private_parking_available",
-                                        "has_gps",
-                                        "has_air_conditioning",
-                                        "automatic_car",
-                                        "has_getaround_connect",
-                                        "has_speed_regulator",
-                                        "winter_tires",
-                                    ],
+                        "type": "array",
+                        "description": "A list of car objects, each containing all required features.",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "mileage": {"type": "float", "example": 7.0},
+                                "engine_power": {
+                                    "type": "float",
+                                    "example": 0.27,
                                 },
-                            }
-                        },
-                        "required": ["input"],
-                        "example": {
-                            "input": [
-                                {
-                                    "mileage": 7.0,
-                                    "engine_power": 0.27,
-                                    "model_key": "Citroën",
-                                    "fuel": "diesel",
-                                    "paint_color": "black",
-                                    "car_type": "sedan",
-                                    "private_parking_available": True,
-                                    "has_gps": True,
-                                    "has_air_conditioning": False,
-                                    "automatic_car": False,
-                                    "has_getaround_connect": True,
-                                    "has_speed_regulator": False,
-                                    "winter_tires": True,
-                                }
-                            ]
-                        },
-                    },
-                    "output": {
-                        "type": "object",
-                        "properties": {
-                            "prediction": {
-                                "type": "array",
-                                "description": "Predicted prices in euros for each input car.",
-                                "example": [123.45],
-                            }
+                                "model_key": {
+                                    "type": "string",
+                                    "example": "Citroën",
+                                },
+                                "fuel": {"type": "string", "example": "diesel"},
+                                "paint_color": {
+                                    "type": "string",
+                                    "example": "black",
+                                },
+                                "car_type": {
+                                    "type": "string",
+                                    "example": "sedan",
+                                },
+                                "private_parking_available": {
+                                    "type": "boolean",
+                                    "example": True,
+                                },
+                                "has_gps": {"type": "boolean", "example": True},
+                                "has_air_conditioning": {
+                                    "type": "boolean",
+                                    "example": False,
+                                },
+                                "automatic_car": {
+                                    "type": "boolean",
+                                    "example": False,
+                                },
+                                "has_getaround_connect": {
+                                    "type": "boolean",
+                                    "example": True,
+                                },
+                                "has_speed_regulator": {
+                                    "type": "boolean",
+                                    "example": False,
+                                },
+                                "winter_tires": {
+                                    "type": "boolean",
+                                    "example": True,
+                                },
+                            },
+                            "required": [
+                                "mileage",
+                                "engine_power",
+                                "model_key",
+                                "fuel",
+                                "paint_color",
+                                "car_type",
+                                "private_parking_available",
+                                "has_gps",
+                                "has_air_conditioning",
+                                "automatic_car",
+                                "has_getaround_connect",
+                                "has_speed_regulator",
+                                "winter_tires",
+                            ],
                         },
-                        "required": ["prediction"],
-                        "example": {"prediction": [123.45]},
-                    },
-                }
+                    }
+                },
+                "required": ["input"],
+                "example": {
+                    "input": [
+                        {
+                            "mileage": 7.0,
+                            "engine_power": 0.27,
+                            "model_key": "Citroën",
+                            "fuel": "diesel",
+                            "paint_color": "black",
+                            "car_type": "sedan",
+                            "private_parking_available": True,
+                            "has_gps": True,
+                            "has_air_conditioning": False,
+                            "automatic_car": False,
+                            "has_getaround_connect": True,
+                            "has_speed_regulator": False,
+                            "winter_tires": True,
+                        }
+                    ]
+                },
             },
-            "usage_example": {
-                "curl": (
-                    "curl -X POST http://localhost:8001/predict \\\n"
-                    '-H "Content-Type: application/json" \\\n'
-                    "-d '{\\n"
-                    '  "input": [\\n'
-                    "    {\\n"
-                    '      "mileage": 7.0,\\n'
-                    '      "engine_power": 0.27,\\n'
-                    '      "model_key": "Citroën",\\n'
-                    '      "fuel": "diesel",\\n'
-                    '      "paint_color": "black",\\n'
-                    '      "car_type": "sedan",\\n'
-                    '      "private_parking_available": true,\\n'
-                    '      "has_gps": true,\\n'
-                    '      "has_air_conditioning": false,\\n'
-                    '      "automatic_car": false,\\n'
-                    '      "has_getaround_connect": true,\\n'
-                    '      "has_speed_regulator": false,\\n'
-                    '      "winter_tires": true\\n'
-                    "    }\\n"
-                    "  ]\\n"
-                    "}'"
-                ),
-                "python": (
-                    "import requests\n"
-                    "url = 'http://localhost:8001/predict'\n"
-                    "payload = {\n"
-                    "  'input': [\n"
-                    "    {\n"
-                    "      'mileage': 7.0,\n"
-                    "      'engine_power': 0.27,\n"
-                    "      'model_key': 'Citroën',\n"
-                    "      'fuel': 'diesel',\n"
-                    "      'paint_color': 'black',\n"
-                    "      'car_type': 'sedan',\n"
-                    "      'private_parking_available': True,\n"
-                    "      'has_gps': True,\n"
-                    "      'has_air_conditioning': False,\n"
-                    "      'automatic_car': False,\n"
-                    "      'has_getaround_connect': True,\n"
-                    "      'has_speed_regulator': False,\n"
-                    "      'winter_tires': True\n"
-                    "    }\n"
-                    "  ]\n"
-                    "}\n"
-                    "response = requests.post(url, json=payload)\n"
-                    "print(response.json())"
-                ),
+            "output": {
+                "type": "object",
+                "properties": {
+                    "prediction": {
+                        "type": "array",
+                        "description": "Predicted prices in euros for each input car.",
+                        "example": [123.45],
+                    }
+                },
+                "required": ["prediction"],
+                "example": {"prediction": [123.45]},
             },
         }
+    },
+    "usage_example": {
+        "curl": (
+            "curl -X POST http://localhost:8001/predict \\\n"
+            '-H "Content-Type: application/json" \\\n'
+            "-d '{\\n"
+            '  "input": [\\n'
+            "    {\\n"
+            '      "mileage": 7.0,\\n'
+            '      "engine_power": 0.27,\\n'
+            '      "model_key": "Citroën",\\n'
+            '      "fuel": "diesel",\\n'
+            '      "paint_color": "black",\\n'
+            '      "car_type": "sedan",\\n'
+            '      "private_parking_available": true,\\n'
+            '      "has_gps": true,\\n'
+            '      "has_air_conditioning": false,\\n'
+            '      "automatic_car": false,\\n'
+            '      "has_getaround_connect": true,\\n'
+            '      "has_speed_regulator": false,\\n'
+            '      "winter_tires": true\\n'
+            "    }\\n"
+            "  ]\\n"
+            "}'"
+        ),
+        "python": (
+            "import requests\n"
+            "url = 'http://localhost:8001/predict'\n"
+            "payload = {\n"
+            "  'input': [\n"
+            "    {\n"
+            "      'mileage': 7.0,\n"
+            "      'engine_power': 0.27,\n"
+            "      'model_key': 'Citroën',\n"
+            "      'fuel': 'diesel',\n"
+            "      'paint_color': 'black',\n"
+            "      'car_type': 'sedan',\n"
+            "      'private_parking_available': True,\n"
+            "      'has_gps': True,\n"
+            "      'has_air_conditioning': False,\n"
+            "      'automatic_car': False,\n"
+            "      'has_getaround_connect': True,\n"
+            "      'has_speed_regulator': False,\n"
+            "      'winter_tires': True\n"
+            "    }\n"
+            "  ]\n"
+            "}\n"
+            "response = requests.post(url, json=payload)\n"
+            "print(response.json())"
+        ),
+    },
+}
+DOCS_BODY = json.dumps(
+    DOCS, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+).encode("utf-8")
+
+
+# Documentation route (currently shadowed: FastAPI registers its Swagger UI at
+# the default docs_url "/docs" first, and the welcome page links to it)
+@app.get("/docs", include_in_schema=False)
+async def custom_docs():
+    """Custom JSON documentation for the API."""
+    return Response(
+        content=DOCS_BODY,
+        media_type="application/json",
+        headers={"Cache-Control": "public, max-age=86400"},
     )
@@ -4,14 +4,120 @@ This application provides an interactive dashboard for analyzing rental delays a
 It uses Streamlit for the frontend and Plotly for visualizations.
 """
 
+import json
+import os
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
 import requests
+from requests.adapters import HTTPAdapter
 
 # Set up Streamlit page configuration
 st.set_page_config(page_title="Getaround Dashboard", layout="wide", page_icon="🚗")
 
+
+# Cached data loaders (reused across reruns triggered by widget interactions)
+@st.cache_data
+def load_delay_data():
+    """Load the ended rentals for which both delay measures are known."""
+    df = pd.read_parquet(
+        "data/get_around_delay_analysis.parquet",
+        engine="pyarrow",
+        filters=[("state", "==", "ended")],
+    )
+    df = df.dropna(
+        subset=[
+            "delay_at_checkout_in_minutes",
+            "time_delta_with_previous_rental_in_minutes",
+        ]
+    )
+    df["checkin_type"] = df["checkin_type"].astype("category")
+    # Truncate to whole minutes, then keep the smallest fitting integer dtype
+    for col in (
+        "delay_at_checkout_in_minutes",
+        "time_delta_with_previous_rental_in_minutes",
+    ):
+        df[col] = pd.to_numeric(df[col].astype("int32"), downcast="integer")
+    return df
+
+
+@st.cache_data
+def filter_delay_data(scope):
+    """Restrict the delay data to the selected check-in scope."""
+    df = load_delay_data()
+    if scope == "Connect only":
+        df = df[df["checkin_type"] == "connect"]
+    return df
+
+
+@st.cache_data
+def to_csv_bytes(df):
+    """Serialize a DataFrame to CSV bytes, once per distinct content."""
+    return df.to_csv(index=False).encode()
+
+
+@st.cache_data
+def load_pricing_data():
+    """Load the pricing dataset without its index column."""
+    df_price = pd.read_csv("data/get_around_pricing_project.csv")
+    df_price = df_price.drop(columns=["Unnamed: 0"], errors="ignore")
+    for col in ("model_key", "fuel", "paint_color", "car_type"):
+        df_price[col] = df_price[col].astype("category")
+    for col in ("mileage", "engine_power", "rental_price_per_day"):
+        df_price[col] = pd.to_numeric(df_price[col], downcast="integer")
+    return df_price
+
+
+@st.cache_data
+def load_categories():
+    """Load the dropdown options saved alongside the model at training time."""
+    path = "model/categories.json"
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    # Fall back to the pricing dataset when no training artifact is available
+    df_price = load_pricing_data()
+    return {
+        "models": df_price["model_key"].cat.categories.tolist(),
+        "fuels": df_price["fuel"].cat.categories.tolist(),
+        "colors": df_price["paint_color"].cat.categories.tolist(),
+        "car_types": df_price["car_type"].cat.categories.tolist(),
+    }
+
+
+def histogram_figure(values, title, color, nbins=None):
+    """Histogram counted server-side, so only the bar heights reach the browser.
+
+    Numeric values are split into ``nbins`` bins, categorical ones are counted
+    per category.
+    """
+    if nbins is None:
+        counts = values.value_counts(sort=False)
+        bar = go.Bar(x=counts.index.astype(str), y=counts.to_numpy())
+    else:
+        counts, edges = np.histogram(values.to_numpy(), bins=nbins)
+        bar = go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges))
+    fig = go.Figure(bar)
+    fig.update_traces(marker_color=color)
+    fig.update_layout(
+        title=title, xaxis_title=values.name, yaxis_title="count", bargap=0
+    )
+    return fig
+
+
+@st.cache_resource
+def get_session():
+    """Shared HTTP session, so API calls reuse pooled keep-alive connections."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=10, pool_maxsize=10)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"Content-Type": "application/json"})
+    return session
+
+
 # Header
 st.markdown(
     """
@@ -30,6 +136,9 @@ with st.sidebar:
     )
     st.caption("Filter, explore and predict in a few clicks.")
 
+# Pricing data shared by the pricing tab (cached across reruns)
+df_price = load_pricing_data()
+
 # Tabs for different analyses
 tab1, tab2, tab3 = st.tabs(
     ["⏱️ Delay Analysis", "💰 Pricing Analysis", "💸 Price Prediction"]
@@ -40,48 +149,35 @@ with tab1:
     st.header("⏱️ Delay Analysis")
     st.info("Analysis of vehicle return delays on Getaround.")
 
-    # Load and filter delay data
-    df = pd.read_csv("data/get_around_delay_analysis.csv")
-    df = df[df["state"] == "ended"]
-    df = df.dropna(
-        subset=[
-            "delay_at_checkout_in_minutes",
-            "time_delta_with_previous_rental_in_minutes",
-        ]
-    )
-    df["delay_at_checkout_in_minutes"] = df["delay_at_checkout_in_minutes"].astype(int)
-    df["time_delta_with_previous_rental_in_minutes"] = df[
-        "time_delta_with_previous_rental_in_minutes"
-    ].astype(int)
-
     # Sidebar delay filters
     st.sidebar.header("Delay Filters")
     threshold = st.sidebar.slider(
         "⏱️ Minimum time between rentals (minutes)", 0, 180, 60, step=15
     )
     scope = st.sidebar.radio("🔐 Check-in type filter", ["All", "Connect only"])
-    if scope == "Connect only":
-        df = df[df["checkin_type"] == "connect"]
 
-    # KPI calculations
-    late_returns = df[df["delay_at_checkout_in_minutes"] > 0]
-    resolved_cases = late_returns[
-        late_returns["delay_at_checkout_in_minutes"] > threshold
-    ]
-    resolved_share = (
-        len(resolved_cases) / len(late_returns) * 100 if len(late_returns) > 0 else 0
-    )
+    # Load and filter delay data (cached across reruns)
+    df = filter_delay_data(scope)
+
+    # KPI calculations, using boolean masks computed once over the columns
+    delay = df["delay_at_checkout_in_minutes"].to_numpy()
+    time_delta = df["time_delta_with_previous_rental_in_minutes"].to_numpy()
+    is_late = delay > 0
+    is_conflict = time_delta < threshold
+    n_late = int(is_late.sum())
+    n_resolved = int((is_late & (delay > threshold)).sum())
+    resolved_share = n_resolved / n_late * 100 if n_late > 0 else 0
 
     # Main metrics cards
     col1, col2, col3 = st.columns(3)
     with col1:
         st.markdown(
-            f"<div style='background:#e8f0fe;padding:20px 12px;border-radius:10px;text-align:center;'><span style='font-size:2.2rem;color:#2980b9;font-weight:700'>{len(late_returns)}</span><br><span style='color:#666;'>Total late returns</span></div>",
+            f"<div style='background:#e8f0fe;padding:20px 12px;border-radius:10px;text-align:center;'><span style='font-size:2.2rem;color:#2980b9;font-weight:700'>{n_late}</span><br><span style='color:#666;'>Total late returns</span></div>",
             unsafe_allow_html=True,
         )
     with col2:
         st.markdown(
-            f"<div style='background:#e8f0fe;padding:20px 12px;border-radius:10px;text-align:center;'><span style='font-size:2.2rem;color:#27ae60;font-weight:700'>{len(resolved_cases)}</span><br><span style='color:#666;'>Resolved (>{threshold} min)</span></div>",
+            f"<div style='background:#e8f0fe;padding:20px 12px;border-radius:10px;text-align:center;'><span style='font-size:2.2rem;color:#27ae60;font-weight:700'>{n_resolved}</span><br><span style='color:#666;'>Resolved (>{threshold} min)</span></div>",
             unsafe_allow_html=True,
         )
     with col3:
@@ -100,26 +196,21 @@ with tab1:
         )
 
     # Delay distribution histogram
-    fig = px.histogram(
-        late_returns,
-        x="delay_at_checkout_in_minutes",
+    fig = histogram_figure(
+        df.loc[is_late, "delay_at_checkout_in_minutes"],
         nbins=40,
         title="Delay at checkout distribution",
-        color_discrete_sequence=["#2980b9"],
+        color="#2980b9",
     )
     st.plotly_chart(fig, use_container_width=True)
 
     # Business impact section
     st.subheader("Business Impact")
 
-    conflicts = df[df["time_delta_with_previous_rental_in_minutes"] < threshold]
     total_rentals = len(df)
-    impacted_revenue = len(conflicts)
+    impacted_revenue = int(is_conflict.sum())
     revenue_share = 100 * impacted_revenue / total_rentals if total_rentals > 0 else 0
-
-    critical_late_returns = late_returns[
-        late_returns["time_delta_with_previous_rental_in_minutes"] < threshold
-    ]
+    n_critical = int((is_late & is_conflict).sum())
 
     col1, col2, col3, col4 = st.columns(4)
     col1.metric(
@@ -127,30 +218,26 @@ with tab1:
         f"{revenue_share:.1f}%",
         delta=f"{impacted_revenue} rentals",
     )
-    col2.metric("Rentals blocked", len(conflicts))
-    col3.metric("Late returns affecting next", len(critical_late_returns))
+    col2.metric("Rentals blocked", impacted_revenue)
+    col3.metric("Late returns affecting next", n_critical)
     col4.metric(
         "Resolved returns",
         f"{resolved_share:.1f}%",
-        delta=f"{len(resolved_cases)} cases",
+        delta=f"{n_resolved} cases",
     )
 
     # Time delta between rentals
     st.subheader("Time between two consecutive rentals")
-    fig_delay = px.histogram(
-        df,
-        x="time_delta_with_previous_rental_in_minutes",
+    fig_delay = histogram_figure(
+        df["time_delta_with_previous_rental_in_minutes"],
         nbins=50,
         title="Time delta distribution between rentals (minutes)",
-        color_discrete_sequence=["#1abc9c"],
+        color="#1abc9c",
     )
     st.plotly_chart(fig_delay, use_container_width=True)
 
     # Boxplot after filtering (delays under 2h)
-    filtered_df = df[
-        (df["delay_at_checkout_in_minutes"] > 0)
-        & (df["delay_at_checkout_in_minutes"] < 120)
-    ]
+    filtered_df = df.loc[is_late & (delay < 120)]
 
     st.subheader("Late returns by check-in type (< 2 hours)")
     fig_box_filtered = px.box(
@@ -167,7 +254,7 @@ with tab1:
     # Download filtered data
     st.download_button(
         "📥 Download filtered delay data",
-        filtered_df.to_csv(index=False).encode(),
+        to_csv_bytes(filtered_df),
         "filtered_delays.csv",
     )
 
@@ -176,48 +263,42 @@ with tab2:
     st.header("💰 Pricing Analysis")
     st.info("Distribution of vehicle characteristics and prices.")
 
-    df_price = pd.read_csv("data/get_around_pricing_project.csv")
-    df_price = df_price.drop(columns=["Unnamed: 0"], errors="ignore")
-
     st.subheader("Mileage distribution")
-    fig_km = px.histogram(
-        df_price,
-        x="mileage",
+    fig_km = histogram_figure(
+        df_price["mileage"],
         nbins=50,
         title="Mileage (km)",
-        color_discrete_sequence=["#2980b9"],
+        color="#2980b9",
     )
     st.plotly_chart(fig_km, use_container_width=True)
 
     st.subheader("Engine power")
-    fig_power = px.histogram(
-        df_price,
-        x="engine_power",
+    fig_power = histogram_figure(
+        df_price["engine_power"],
         nbins=30,
         title="Engine power (HP)",
-        color_discrete_sequence=["#1abc9c"],
+        color="#1abc9c",
     )
     st.plotly_chart(fig_power, use_container_width=True)
 
     st.subheader("Daily rental price")
-    fig_price = px.histogram(
-        df_price,
-        x="rental_price_per_day",
+    fig_price = histogram_figure(
+        df_price["rental_price_per_day"],
         nbins=40,
         title="Rental price per day (€)",
-        color_discrete_sequence=["#27ae60"],
+        color="#27ae60",
     )
     st.plotly_chart(fig_price, use_container_width=True)
 
     st.subheader("Fuel type distribution")
-    fig_fuel = px.histogram(
-        df_price, x="fuel", title="Fuel types", color_discrete_sequence=["#ff7675"]
+    fig_fuel = histogram_figure(
+        df_price["fuel"], title="Fuel types", color="#ff7675"
     )
     st.plotly_chart(fig_fuel, use_container_width=True)
 
     st.subheader("Car types")
-    fig_cartype = px.histogram(
-        df_price, x="car_type", title="Car types", color_discrete_sequence=["#636e72"]
+    fig_cartype = histogram_figure(
+        df_price["car_type"], title="Car types", color="#636e72"
     )
     st.plotly_chart(fig_cartype, use_container_width=True)
 
@@ -238,14 +319,12 @@ with tab3:
     st.header("💸 Price Prediction")
     st.info("Fill out the form to get a rental price prediction for a car.")
 
-    # Load unique values for dropdowns from pricing dataset
-    df_price = pd.read_csv("data/get_around_pricing_project.csv")
-    df_price = df_price.drop(columns=["Unnamed: 0"], errors="ignore")
-
-    models = sorted(df_price["model_key"].dropna().unique())
-    fuels = sorted(df_price["fuel"].dropna().unique())
-    colors = sorted(df_price["paint_color"].dropna().unique())
-    car_types = sorted(df_price["car_type"].dropna().unique())
+    # Load dropdown values saved at training time
+    categories = load_categories()
+    models = categories["models"]
+    fuels = categories["fuels"]
+    colors = categories["colors"]
+    car_types = categories["car_types"]
 
     with st.form(key="predict_form"):
         c1, c2 = st.columns(2)
@@ -292,7 +371,9 @@ with tab3:
         # Adjust the API URL as needed (Docker = service name instead of localhost)
         api_url = "http://api:8001/predict"
         try:
-            response = requests.post(api_url, json={"input": [input_data]})
+            response = get_session().post(
+                api_url, json={"input": [input_data]}, timeout=5
+            )
             if response.status_code == 200:
                 prediction = response.json()["prediction"][0]
                 st.success(f"Predicted rental price: **{prediction:.2f} €**")
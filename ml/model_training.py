@@ -1,9 +1,10 @@
 """
 Model training script for Getaround pricing prediction.
-This script loads the dataset, preprocesses the data, trains a Random Forest model,
-evaluates it, and logs the results to MLflow.
+This script loads the dataset, preprocesses the data, trains a gradient boosting model,
+evaluates it, logs the results to MLflow and exports it to ONNX.
 """
 
+import json
 import os
 import pandas as pd
 import joblib
@@ -12,14 +13,21 @@ from sklearn.pipeline import Pipeline
 from sklearn.compose import ColumnTransformer
 from sklearn.preprocessing import OneHotEncoder, StandardScaler
 from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestRegressor
+from sklearn.ensemble import HistGradientBoostingRegressor
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 from mlflow.models.signature import infer_signature
+from skl2onnx import convert_sklearn
+from skl2onnx.common.data_types import FloatTensorType, StringTensorType
 
 # Load dataset
 df = pd.read_csv("data/get_around_pricing_project.csv")
 df.drop(columns=["Unnamed: 0"], inplace=True, errors="ignore")
 
+# Convert the delay dataset to Parquet for faster loading in the dashboard
+pd.read_csv("data/get_around_delay_analysis.csv").to_parquet(
+    "data/get_around_delay_analysis.parquet", compression="zstd", index=False
+)
+
 # Define target and features
 TARGET = "rental_price_per_day"
 X = df.drop(columns=[TARGET])
@@ -38,7 +46,11 @@ boolean_features = X.select_dtypes("bool").columns.tolist()
 preprocessor = ColumnTransformer(
     transformers=[
         ("num", StandardScaler(), numeric_features),
-        ("cat", OneHotEncoder(handle_unknown="ignore"), categorical_features),
+        (
+            "cat",
+            OneHotEncoder(handle_unknown="ignore", sparse_output=False),
+            categorical_features,
+        ),
     ],
     remainder="passthrough",
 )
@@ -47,7 +59,12 @@ preprocessor = ColumnTransformer(
 pipeline = Pipeline(
     steps=[
         ("preprocessor", preprocessor),
-        ("model", RandomForestRegressor(n_estimators=100, random_state=42)),
+        (
+            "model",
+            HistGradientBoostingRegressor(
+                max_iter=200, max_leaf_nodes=31, random_state=42
+            ),
+        ),
     ]
 )
 
@@ -90,5 +107,32 @@ with mlflow.start_run():
     os.makedirs("model", exist_ok=True)
     joblib.dump(pipeline, "model/model.joblib")
 
+    # Save the known categories, used by the dashboard's prediction form
+    categories = {
+        "models": sorted(X["model_key"].dropna().unique().tolist()),
+        "fuels": sorted(X["fuel"].dropna().unique().tolist()),
+        "colors": sorted(X["paint_color"].dropna().unique().tolist()),
+        "car_types": sorted(X["car_type"].dropna().unique().tolist()),
+    }
+    with open("model/categories.json", "w", encoding="utf-8") as f:
+        json.dump(categories, f, ensure_ascii=False, indent=2)
+
+    # Export the pipeline to ONNX for serving with ONNX Runtime
+    # (one [N, 1] input per column, booleans are fed as floats)
+    initial_types = [
+        (
+            col,
+            (
+                StringTensorType([None, 1])
+                if col in categorical_features
+                else FloatTensorType([None, 1])
+            ),
+        )
+        for col in X.columns
+    ]
+    onnx_model = convert_sklearn(pipeline, initial_types=initial_types)
+    with open("model/model.onnx", "wb") as f:
+        f.write(onnx_model.SerializeToString())
+
     print("Model trained and saved successfully")
     print(f"MAE: {mae:.2f} | RMSE: {rmse:.2f} | R²: {r2:.3f}")